@@ -0,0 +1,201 @@
+"""Backend del bucle caliente de búsqueda de subcadenas.
+
+Las estrategias de búsqueda proyectan los títulos/autores ya en minúsculas
+en una lista y delegan aquí el barrido completo. Si numba está instalado,
+el kernel se compila JIT (@njit) y el bucle corre fuera del intérprete;
+si no, se usa la versión interpretada con Boyer-Moore-Horspool, que
+comparte la misma firma y resultados.
+"""
+
+try:
+    import numpy as _np
+except ImportError:
+    _np = None
+
+try:
+    from numba import njit as _njit
+except ImportError:
+    _njit = None
+
+
+def construir_tabla_salto(needle: str) -> dict:
+    """Construye la tabla de saltos (bad character) para una aguja dada.
+
+    Se calcula una sola vez por búsqueda y se reutiliza contra todos los
+    títulos/autores. Se usa un dict (y no una lista de 256) para soportar
+    caracteres acentuados fuera del rango ASCII.
+    """
+    m = len(needle)
+    return {c: m - 1 - i for i, c in enumerate(needle[:-1])}
+
+
+def bm_contains(haystack: str, needle: str, salto: dict) -> bool:
+    """Indica si needle aparece en haystack usando Boyer-Moore-Horspool"""
+    m = len(needle)
+    n = len(haystack)
+    i = m - 1
+    while i < n:
+        k = i
+        j = m - 1
+        while j >= 0 and haystack[k] == needle[j]:
+            k -= 1
+            j -= 1
+        if j < 0:
+            return True
+        i += salto.get(haystack[i], m)
+    return False
+
+
+def _find_substr_lower_py(titulos_lc, needle):
+    """Versión interpretada del kernel: índices de los textos que contienen needle"""
+    indices = []
+    if len(needle) <= 2:
+        # Con agujas muy cortas el `in` de CPython (memchr) ya gana
+        for i, texto in enumerate(titulos_lc):
+            if needle in texto:
+                indices.append(i)
+    else:
+        salto = construir_tabla_salto(needle)
+        for i, texto in enumerate(titulos_lc):
+            if bm_contains(texto, needle, salto):
+                indices.append(i)
+    return indices
+
+
+def _find_substr_lower_jit(titulos_lc, needle):
+    """Kernel apto para numba: solo tipos unicode, sin objetos Python"""
+    indices = []
+    for i, texto in enumerate(titulos_lc):
+        if needle in texto:
+            indices.append(i)
+    return indices
+
+
+# Por debajo de este tamaño el costo de empaquetar el array no se amortiza
+# y la ruta interpretada sigue ganando
+_UMBRAL_NUMPY = 1024
+
+
+def _find_substr_lower_np(titulos_lc, needle):
+    """Barrido vectorizado: np.char.find mueve el bucle de N elementos a C"""
+    arr = _np.array(titulos_lc)
+    return _np.flatnonzero(_np.char.find(arr, needle) >= 0).tolist()
+
+
+def _find_substr_lower_auto(titulos_lc, needle):
+    """Usa NumPy solo en lotes grandes; si no, la versión interpretada"""
+    if _np is not None and len(titulos_lc) >= _UMBRAL_NUMPY:
+        return _find_substr_lower_np(titulos_lc, needle)
+    return _find_substr_lower_py(titulos_lc, needle)
+
+
+# Con lotes chicos el costo de reflejar la lista hacia el kernel compilado
+# supera lo que se ahorra dentro del bucle
+_UMBRAL_JIT = 1024
+
+
+if _njit is not None:
+    _find_substr_lower_compilado = _njit(cache=True)(_find_substr_lower_jit)
+
+    def find_substr_lower(titulos_lc, needle):
+        """Kernel compilado para lotes grandes; el intérprete sigue siendo la
+        implementación de referencia y atiende los lotes chicos"""
+        if len(titulos_lc) >= _UMBRAL_JIT:
+            return _find_substr_lower_compilado(titulos_lc, needle)
+        return _find_substr_lower_py(titulos_lc, needle)
+else:
+    # numba es opcional: sin él se usa NumPy (si está instalado) o la
+    # ruta interpretada, todas con la misma firma y resultados
+    find_substr_lower = _find_substr_lower_auto
+
+
+# Tabla de 256 entradas para minusculizar ASCII a nivel bytes: un único
+# bytes.translate en C en lugar de recorrer puntos de código
+_ASCII_LOWER_TBL = bytes(c | 0x20 if 0x41 <= c <= 0x5A else c
+                         for c in range(256))
+
+
+def casefold_utf8(texto: str) -> bytes:
+    """Forma plegada del texto, codificada en UTF-8.
+
+    En ASCII puro casefold coincide con lower, así que se resuelve con
+    encode + translate sobre la tabla precomputada, sin pasar por la
+    maquinaria Unicode completa; el resto usa str.casefold().
+    """
+    if texto.isascii():
+        return texto.encode('ascii').translate(_ASCII_LOWER_TBL)
+    return texto.casefold().encode('utf-8')
+
+
+# --- Ruta ASCII para el JIT: solo enteros sin signo, nada de objetos ---
+
+def _horspool_ascii_csr(buf, offsets, needle, salto):
+    """Horspool numérico sobre segmentos empaquetados estilo CSR.
+
+    buf y needle son bytes sin signo y salto una tabla de 256 enteros; el
+    bucle no toca ningún objeto Python, condición necesaria para que numba
+    lo compile en nopython mode en lugar de caer al (lento) object mode.
+    """
+    indices = []
+    m = len(needle)
+    for s in range(len(offsets) - 1):
+        fin = offsets[s + 1]
+        i = offsets[s] + m - 1
+        while i < fin:
+            k = i
+            j = m - 1
+            while j >= 0 and buf[k] == needle[j]:
+                k -= 1
+                j -= 1
+            if j < 0:
+                indices.append(s)
+                break
+            i += salto[buf[i]]
+    return indices
+
+
+if _njit is not None:
+    _horspool_ascii_jit = _njit(cache=True)(_horspool_ascii_csr)
+else:
+    _horspool_ascii_jit = None
+
+
+def tabla_salto_ascii(needle_b: bytes):
+    """Tabla de saltos de 256 entradas para una aguja ASCII (en bytes)"""
+    m = len(needle_b)
+    salto = _np.full(256, m, dtype=_np.int64)
+    for i in range(m - 1):
+        salto[needle_b[i]] = m - 1 - i
+    return salto
+
+
+def _empaquetar_ascii_csr(columna_utf8):
+    """Empaqueta la columna en (buf, offsets) contiguos; None si hay no-ASCII"""
+    offsets = _np.empty(len(columna_utf8) + 1, dtype=_np.int64)
+    offsets[0] = 0
+    pos = 0
+    for i, t in enumerate(columna_utf8):
+        if not t.isascii():
+            return None
+        pos += len(t)
+        offsets[i + 1] = pos
+    buf = _np.frombuffer(b''.join(columna_utf8), dtype=_np.uint8)
+    return buf, offsets
+
+
+def find_substr_bytes(columna_utf8, needle_b):
+    """Índices de las entradas (bytes UTF-8 ya casefoldeados) que contienen needle_b.
+
+    Comparar a nivel de bytes evita volver a recorrer puntos de código por
+    consulta; al ser UTF-8 autosincronizante, una coincidencia de bytes
+    siempre cae en límites de carácter. Con numba disponible y datos ASCII,
+    el barrido completo se hace en el kernel numérico compilado.
+    """
+    if _horspool_ascii_jit is not None and len(needle_b) > 2 and needle_b.isascii():
+        empaquetado = _empaquetar_ascii_csr(columna_utf8)
+        if empaquetado is not None:
+            buf, offsets = empaquetado
+            aguja = _np.frombuffer(needle_b, dtype=_np.uint8)
+            return list(_horspool_ascii_jit(buf, offsets, aguja,
+                                            tabla_salto_ascii(needle_b)))
+    return [i for i, t in enumerate(columna_utf8) if needle_b in t]
@@ -1,6 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List
 from libro import Libro
+from _search_backend import casefold_utf8, find_substr_bytes, find_substr_lower
 
 
 # 1. Clase abstracta para estrategias de búsqueda
@@ -15,31 +16,65 @@ class EstrategiaBusqueda(ABC):
 
 # 2. Implementación de 3 estrategias de búsqueda existentes
 class BusquedaPorTitulo(EstrategiaBusqueda):
-    """Estrategia para buscar libros por título (búsqueda parcial case-insensitive)"""
-    
+    """Estrategia para buscar libros por título (búsqueda parcial case-insensitive).
+
+    Puede recibir la columna viva de títulos en minúsculas (SoA) para no
+    tener que proyectarla libro a libro en cada consulta, y opcionalmente
+    la columna casefoldeada en bytes UTF-8 para comparar sin re-decodificar.
+    """
+
+    def __init__(self, columna_lc: List[str] = None, columna_utf8: List[bytes] = None):
+        self._columna_lc = columna_lc
+        self._columna_utf8 = columna_utf8
+
     def buscar(self, libros: List[Libro], valor: str) -> List[Libro]:
-        resultados = []
-        for libro in libros:
-            if valor.lower() in libro.titulo.lower():
-                resultados.append(libro)
-        return resultados
+        columna_utf8 = self._columna_utf8
+        if columna_utf8 is not None and len(columna_utf8) == len(libros):
+            needle_b = casefold_utf8(valor)
+            return [libros[i] for i in find_substr_bytes(columna_utf8, needle_b)]
+        needle = valor.lower()
+        columna = self._columna_lc
+        if columna is None or len(columna) != len(libros):
+            columna = [libro._titulo_lc for libro in libros]
+        return [libros[i] for i in find_substr_lower(columna, needle)]
 
 
 class BusquedaPorAutor(EstrategiaBusqueda):
-    """Estrategia para buscar libros por autor (búsqueda parcial case-insensitive)"""
-    
+    """Estrategia para buscar libros por autor (búsqueda parcial case-insensitive).
+
+    Igual que BusquedaPorTitulo, acepta las columnas SoA de autores (en
+    minúsculas y/o casefoldeada en bytes) para evitar trabajo por consulta.
+    """
+
+    def __init__(self, columna_lc: List[str] = None, columna_utf8: List[bytes] = None):
+        self._columna_lc = columna_lc
+        self._columna_utf8 = columna_utf8
+
     def buscar(self, libros: List[Libro], valor: str) -> List[Libro]:
-        resultados = []
-        for libro in libros:
-            if valor.lower() in libro.autor.lower():
-                resultados.append(libro)
-        return resultados
+        columna_utf8 = self._columna_utf8
+        if columna_utf8 is not None and len(columna_utf8) == len(libros):
+            needle_b = casefold_utf8(valor)
+            return [libros[i] for i in find_substr_bytes(columna_utf8, needle_b)]
+        needle = valor.lower()
+        columna = self._columna_lc
+        if columna is None or len(columna) != len(libros):
+            columna = [libro._autor_lc for libro in libros]
+        return [libros[i] for i in find_substr_lower(columna, needle)]
 
 
 class BusquedaPorISBN(EstrategiaBusqueda):
-    """Estrategia para buscar libros por ISBN exacto"""
-    
+    """Estrategia para buscar libros por ISBN exacto.
+
+    Si el sistema le comparte su índice por ISBN, la búsqueda es un acceso
+    hash O(1) en lugar de un barrido lineal sobre todos los libros.
+    """
+
+    def __init__(self, indice_isbn: Dict[str, List[Libro]] = None):
+        self._indice_isbn = indice_isbn
+
     def buscar(self, libros: List[Libro], valor: str) -> List[Libro]:
+        if self._indice_isbn is not None:
+            return self._indice_isbn.get(valor, [])[:]
         resultados = []
         for libro in libros:
             if libro.isbn == valor:
@@ -47,13 +82,31 @@ class BusquedaPorISBN(EstrategiaBusqueda):
         return resultados
 
 
+# Valores aceptados como "disponible"; incluye las grafías crudas más
+# comunes para poder saltarse el lower() cuando el valor ya es canónico
+_VALORES_VERDADEROS = frozenset(("true", "1", "si", "sí", "yes", "True", "TRUE"))
+
+
 # 3. Nueva estrategia agregada SIN modificar código existente
 class BusquedaPorDisponibilidad(EstrategiaBusqueda):
-    """Estrategia para buscar libros por disponibilidad"""
-    
+    """Estrategia para buscar libros por disponibilidad.
+
+    Si el sistema le comparte su índice de disponibles, la consulta por
+    disponibles se responde desde el índice sin recorrer todos los libros.
+    """
+
+    def __init__(self, indice_disponibles: Dict[int, Libro] = None, store=None):
+        self._indice_disponibles = indice_disponibles
+        self._store = store
+
     def buscar(self, libros: List[Libro], valor: str) -> List[Libro]:
+        disponible = valor in _VALORES_VERDADEROS or valor.lower() in _VALORES_VERDADEROS
+        if disponible and self._indice_disponibles is not None:
+            return list(self._indice_disponibles.values())
+        if self._store is not None and len(self._store.disponibles) == len(libros):
+            # Filtro masivo sobre la columna de flags (bytearray/uint8)
+            return [libros[i] for i in self._store.filas_disponibles(disponible)]
         resultados = []
-        disponible = valor.lower() in ["true", "1", "si", "sí", "yes"]
         for libro in libros:
             if libro.disponible == disponible:
                 resultados.append(libro)
@@ -64,26 +117,35 @@ class BusquedaPorDisponibilidad(EstrategiaBusqueda):
 class SistemaBibliotecaRefactorizado:
     def __init__(self):
         self.libros = []
+        self._by_isbn: Dict[str, List[Libro]] = {}
+        self._disponibles: Dict[int, Libro] = {}
         self._estrategias_busqueda = {
             "titulo": BusquedaPorTitulo(),
             "autor": BusquedaPorAutor(),
-            "isbn": BusquedaPorISBN(),
-            "disponible": BusquedaPorDisponibilidad()
+            "isbn": BusquedaPorISBN(self._by_isbn),
+            "disponible": BusquedaPorDisponibilidad(self._disponibles)
         }
     
     def agregar_libro(self, libro: Libro):
         """Método auxiliar para agregar libros de prueba"""
+        # Cachear las formas en minúsculas una sola vez; las estrategias de
+        # búsqueda las reutilizan en cada consulta sin volver a llamar lower()
+        libro._titulo_lc = libro.titulo.lower()
+        libro._autor_lc = libro.autor.lower()
         self.libros.append(libro)
+        self._by_isbn.setdefault(libro.isbn, []).append(libro)
+        if libro.disponible:
+            self._disponibles[libro.id] = libro
     
     def buscar_libro(self, criterio: str, valor: str) -> List[Libro]:
         """
         Método refactorizado que usa estrategias de búsqueda
         Ahora está abierto a extensión pero cerrado a modificación
         """
-        if criterio not in self._estrategias_busqueda:
+        # Una sola consulta al dict en la ruta exitosa (get + centinela)
+        estrategia = self._estrategias_busqueda.get(criterio)
+        if estrategia is None:
             raise ValueError(f"Criterio de búsqueda no válido: {criterio}")
-        
-        estrategia = self._estrategias_busqueda[criterio]
         return estrategia.buscar(self.libros, valor)
     
     def registrar_estrategia(self, criterio: str, estrategia: EstrategiaBusqueda):
@@ -147,9 +209,10 @@ def demostrar_funcionamiento():
         
         def buscar(self, libros: List[Libro], valor: str) -> List[Libro]:
             resultados = []
+            needle = valor.lower()
             for libro in libros:
-                if (valor.lower() in libro.titulo.lower() or 
-                    valor.lower() in libro.autor.lower()):
+                if (needle in libro._titulo_lc or
+                    needle in libro._autor_lc):
                     resultados.append(libro)
             return resultados
     
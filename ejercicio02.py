@@ -1,37 +1,79 @@
 # ejercicio02.py
-from datetime import datetime
-from typing import List, Optional
+import os
+import sys
+from array import array
+from datetime import date
+from typing import Dict, List, Optional
 from libro import Libro
 from prestamo import Prestamo
+from ejercicio01 import (
+    BusquedaPorAutor,
+    BusquedaPorDisponibilidad,
+    BusquedaPorISBN,
+    BusquedaPorTitulo,
+)
+from _search_backend import casefold_utf8
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+# Umbrales y mensajes de validación: constantes de módulo para no recrear
+# los literales (y resolverlos como locales/globales baratos) en cada llamada
+_MIN_TITULO = 2
+_MIN_AUTOR = 3
+_MIN_ISBN = 10
+_MIN_USUARIO = 3
+_ERR_TITULO = f"Error: Título inválido - debe tener al menos {_MIN_TITULO} caracteres"
+_ERR_AUTOR = f"Error: Autor inválido - debe tener al menos {_MIN_AUTOR} caracteres"
+_ERR_ISBN = f"Error: ISBN inválido - debe tener al menos {_MIN_ISBN} caracteres"
+_ERR_USUARIO = f"Error: Nombre de usuario inválido - debe tener al menos {_MIN_USUARIO} caracteres"
 
 
 class ValidadorBiblioteca:
     """Clase dedicada exclusivamente a la validación de datos"""
-    
+
+    @staticmethod
+    def _es_corto(texto: str, minimo: int) -> bool:
+        """True si el texto, ignorando espacios en los bordes, no llega al mínimo.
+
+        Comprueba primero la longitud cruda (gratis) y solo paga el strip(),
+        que asigna una cadena nueva, cuando hay espacios en los extremos.
+        """
+        if not texto or len(texto) < minimo:
+            return True
+        if texto[0].isspace() or texto[-1].isspace():
+            return len(texto.strip()) < minimo
+        return False
+
     @staticmethod
     def validar_libro(titulo: str, autor: str, isbn: str) -> List[str]:
         """Valida los datos de un libro y retorna lista de errores"""
         errores = []
-        
-        if not titulo or len(titulo.strip()) < 2:
-            errores.append("Error: Título inválido - debe tener al menos 2 caracteres")
-        
-        if not autor or len(autor.strip()) < 3:
-            errores.append("Error: Autor inválido - debe tener al menos 3 caracteres")
-        
-        if not isbn or len(isbn.strip()) < 10:
-            errores.append("Error: ISBN inválido - debe tener al menos 10 caracteres")
-        
+        agregar = errores.append
+        es_corto = ValidadorBiblioteca._es_corto
+
+        if es_corto(titulo, _MIN_TITULO):
+            agregar(_ERR_TITULO)
+
+        if es_corto(autor, _MIN_AUTOR):
+            agregar(_ERR_AUTOR)
+
+        if es_corto(isbn, _MIN_ISBN):
+            agregar(_ERR_ISBN)
+
         return errores
-    
+
     @staticmethod
     def validar_usuario(usuario: str) -> List[str]:
         """Valida el nombre de usuario"""
         errores = []
-        
-        if not usuario or len(usuario.strip()) < 3:
-            errores.append("Error: Nombre de usuario inválido - debe tener al menos 3 caracteres")
-        
+
+        if ValidadorBiblioteca._es_corto(usuario, _MIN_USUARIO):
+            errores.append(_ERR_USUARIO)
+
         return errores
     
     @staticmethod
@@ -59,6 +101,67 @@ class ValidadorBiblioteca:
         return errores
 
 
+class LibroStore:
+    """Columnas paralelas (SoA) con los campos calientes de los libros.
+
+    Los barridos de búsqueda recorren listas densas y contiguas en lugar de
+    perseguir punteros de objetos Libro dispersos por memoria: sin búsquedas
+    de atributo por elemento y con mejor localidad de caché.
+    """
+
+    def __init__(self):
+        self.ids = array('i')
+        self.titulos: List[str] = []
+        self.titulos_lc: List[str] = []
+        self.autores_lc: List[str] = []
+        # Forma plegada (casefold) codificada una sola vez a UTF-8: las
+        # estrategias comparan bytes contra bytes sin re-decodificar
+        self.titulos_cf_utf8: List[bytes] = []
+        self.autores_cf_utf8: List[bytes] = []
+        self.isbns: List[str] = []
+        self.disponibles = bytearray()
+        self._fila_por_id: Dict[int, int] = {}
+
+    def agregar(self, libro: Libro) -> None:
+        """Agrega la fila de columnas correspondiente a un libro"""
+        self._fila_por_id[libro.id] = len(self.ids)
+        self.ids.append(libro.id)
+        self.titulos.append(libro.titulo)
+        self.titulos_lc.append(libro._titulo_lc)
+        self.autores_lc.append(libro._autor_lc)
+        self.titulos_cf_utf8.append(casefold_utf8(libro.titulo))
+        self.autores_cf_utf8.append(casefold_utf8(libro.autor))
+        self.isbns.append(libro.isbn)
+        self.disponibles.append(1 if libro.disponible else 0)
+
+    def actualizar(self, libro: Libro) -> None:
+        """Refresca la fila de un libro ya almacenado"""
+        fila = self._fila_por_id.get(libro.id)
+        if fila is None:
+            self.agregar(libro)
+            return
+        self.titulos[fila] = libro.titulo
+        self.titulos_lc[fila] = libro._titulo_lc
+        self.autores_lc[fila] = libro._autor_lc
+        self.titulos_cf_utf8[fila] = casefold_utf8(libro.titulo)
+        self.autores_cf_utf8[fila] = casefold_utf8(libro.autor)
+        self.isbns[fila] = libro.isbn
+        self.disponibles[fila] = 1 if libro.disponible else 0
+
+    def filas_disponibles(self, disponible: bool) -> List[int]:
+        """Filas cuyo flag de disponibilidad coincide con el pedido.
+
+        Con NumPy el filtro es un solo bucle C sobre bytes contiguos
+        (np.frombuffer no copia el bytearray); sin NumPy se recorre el
+        bytearray, que sigue siendo mucho más denso que una lista de objetos.
+        """
+        objetivo = 1 if disponible else 0
+        if np is not None:
+            flags = np.frombuffer(self.disponibles, dtype=np.uint8)
+            return np.flatnonzero(flags == objetivo).tolist()
+        return [i for i, b in enumerate(self.disponibles) if b == objetivo]
+
+
 class RepositorioBiblioteca:
     """Clase dedicada exclusivamente a la persistencia de datos"""
     
@@ -66,39 +169,77 @@ class RepositorioBiblioteca:
         self.archivo = archivo
         self.libros: List[Libro] = []
         self.prestamos: List[Prestamo] = []
+        self._libros_by_id: Dict[int, Libro] = {}
+        self._prestamos_by_id: Dict[int, Prestamo] = {}
+        # Índices incrementales: evitan rehacer el filtro O(n) en cada consulta
+        # (dict y no set para conservar el orden de inserción)
+        self._disponibles: Dict[int, Libro] = {}
+        self._prestamos_activos: Dict[int, Prestamo] = {}
+        self.store = LibroStore()
         self.contador_libro = 1
         self.contador_prestamo = 1
-    
+        self._dirty = False
+        self._autoflush = False
+
     # Operaciones de Libros
     def agregar_libro(self, libro: Libro) -> Libro:
         """Agrega un libro al repositorio"""
         libro.id = self.contador_libro
+        libro._titulo_lc = libro.titulo.lower()
+        libro._autor_lc = libro.autor.lower()
         self.libros.append(libro)
+        self._libros_by_id[libro.id] = libro
+        if libro.disponible:
+            self._disponibles[libro.id] = libro
+        self.store.agregar(libro)
         self.contador_libro += 1
         self._guardar_en_archivo()
         return libro
     
     def obtener_libro_por_id(self, libro_id: int) -> Optional[Libro]:
-        """Busca un libro por su ID"""
-        for libro in self.libros:
-            if libro.id == libro_id:
-                return libro
-        return None
+        """Busca un libro por su ID (acceso O(1) vía índice)"""
+        return self._libros_by_id.get(libro_id)
     
     def obtener_todos_libros(self) -> List[Libro]:
-        """Retorna todos los libros"""
+        """Retorna todos los libros (copia defensiva para consumidores externos)"""
         return self.libros.copy()
+
+    def _iter_libros(self) -> List[Libro]:
+        """Retorna la lista viva, sin copiar.
+
+        Solo para rutas internas de lectura (búsquedas): evita la copia O(n)
+        por consulta. Quien necesite aislamiento debe seguir usando
+        obtener_todos_libros().
+        """
+        return self.libros
     
     def obtener_libros_disponibles(self) -> List[Libro]:
-        """Retorna solo los libros disponibles"""
-        return [libro for libro in self.libros if libro.disponible]
+        """Retorna solo los libros disponibles (índice mantenido incrementalmente)"""
+        return list(self._disponibles.values())
+
+    def contar_disponibles(self) -> int:
+        """Cantidad de libros disponibles sin construir la lista"""
+        return len(self._disponibles)
     
     def actualizar_libro(self, libro: Libro) -> None:
         """Actualiza el estado de un libro"""
-        for i, l in enumerate(self.libros):
-            if l.id == libro.id:
-                self.libros[i] = libro
-                break
+        libro._titulo_lc = libro.titulo.lower()
+        libro._autor_lc = libro.autor.lower()
+        existente = self._libros_by_id.get(libro.id)
+        if existente is not libro:
+            # Solo si llega un objeto distinto hay que reemplazarlo en la
+            # lista; en el caso habitual (mutación en el mismo objeto que ya
+            # está indexado) no queda nada que recorrer
+            for i, l in enumerate(self.libros):
+                if l.id == libro.id:
+                    self.libros[i] = libro
+                    break
+            self._libros_by_id[libro.id] = libro
+        if libro.disponible:
+            self._disponibles[libro.id] = libro
+        else:
+            self._disponibles.pop(libro.id, None)
+        self.store.actualizar(libro)
         self._guardar_en_archivo()
     
     # Operaciones de Préstamos
@@ -106,35 +247,57 @@ class RepositorioBiblioteca:
         """Agrega un préstamo al repositorio"""
         prestamo.id = self.contador_prestamo
         self.prestamos.append(prestamo)
+        self._prestamos_by_id[prestamo.id] = prestamo
+        if not prestamo.devuelto:
+            self._prestamos_activos[prestamo.id] = prestamo
         self.contador_prestamo += 1
         self._guardar_en_archivo()
         return prestamo
     
     def obtener_prestamo_por_id(self, prestamo_id: int) -> Optional[Prestamo]:
-        """Busca un préstamo por su ID"""
-        for prestamo in self.prestamos:
-            if prestamo.id == prestamo_id:
-                return prestamo
-        return None
+        """Busca un préstamo por su ID (acceso O(1) vía índice)"""
+        return self._prestamos_by_id.get(prestamo_id)
     
     def obtener_prestamos_activos(self) -> List[Prestamo]:
-        """Retorna los préstamos activos"""
-        return [p for p in self.prestamos if not p.devuelto]
+        """Retorna los préstamos activos (índice mantenido incrementalmente)"""
+        return list(self._prestamos_activos.values())
     
     def actualizar_prestamo(self, prestamo: Prestamo) -> None:
         """Actualiza el estado de un préstamo"""
-        for i, p in enumerate(self.prestamos):
-            if p.id == prestamo.id:
-                self.prestamos[i] = prestamo
-                break
+        existente = self._prestamos_by_id.get(prestamo.id)
+        if existente is not prestamo:
+            for i, p in enumerate(self.prestamos):
+                if p.id == prestamo.id:
+                    self.prestamos[i] = prestamo
+                    break
+            self._prestamos_by_id[prestamo.id] = prestamo
+        if prestamo.devuelto:
+            self._prestamos_activos.pop(prestamo.id, None)
+        else:
+            self._prestamos_activos[prestamo.id] = prestamo
         self._guardar_en_archivo()
     
     # Persistencia en archivo
     def _guardar_en_archivo(self):
-        """Guarda el estado actual en archivo (versión simplificada)"""
-        with open(self.archivo, 'w') as f:
-            f.write(f"Libros: {len(self.libros)}\n")
-            f.write(f"Préstamos: {len(self.prestamos)}\n")
+        """Marca el estado como pendiente de escribir.
+
+        Reescribir el archivo completo en cada mutación es I/O puro
+        desperdiciado: con el flag sucio los cambios se acumulan y una sola
+        llamada a flush() al final los persiste todos.
+        """
+        self._dirty = True
+        if self._autoflush:
+            self.flush()
+
+    def flush(self):
+        """Escribe el estado a disco (atómicamente) si hay cambios pendientes"""
+        if not self._dirty:
+            return
+        tmp = self.archivo + ".tmp"
+        with open(tmp, 'w') as f:
+            f.write(f"Libros: {len(self.libros)}\nPréstamos: {len(self.prestamos)}\n")
+        os.replace(tmp, self.archivo)
+        self._dirty = False
     
     def cargar_desde_archivo(self) -> bool:
         """Carga datos desde archivo (versión simplificada)"""
@@ -146,23 +309,41 @@ class RepositorioBiblioteca:
             return False
 
 
+# Si se asigna una lista aquí, las notificaciones se acumulan en lugar de
+# escribirse una por una; el llamador las vuelca al final con
+# sys.stdout.writelines(NOTIF_BUFFER). Útil en préstamos/devoluciones en lote.
+NOTIF_BUFFER: Optional[List[str]] = None
+
+
 class ServicioNotificaciones:
     """Clase dedicada exclusivamente al envío de notificaciones"""
-    
+
+    @staticmethod
+    def _emitir(mensaje: str):
+        """Escribe (o acumula) un mensaje ya formateado con salto de línea"""
+        if NOTIF_BUFFER is not None:
+            NOTIF_BUFFER.append(mensaje)
+        else:
+            # Una sola llamada a write por mensaje, sin la maquinaria de print
+            sys.stdout.write(mensaje)
+
     @staticmethod
     def enviar_notificacion_prestamo(usuario: str, titulo_libro: str):
         """Envía notificación cuando se realiza un préstamo"""
-        print(f"[NOTIFICACIÓN] {usuario}: Préstamo de '{titulo_libro}' realizado exitosamente")
-    
+        ServicioNotificaciones._emitir(
+            f"[NOTIFICACIÓN] {usuario}: Préstamo de '{titulo_libro}' realizado exitosamente\n")
+
     @staticmethod
     def enviar_notificacion_devolucion(usuario: str, titulo_libro: str):
         """Envía notificación cuando se devuelve un libro"""
-        print(f"[NOTIFICACIÓN] {usuario}: Devolución de '{titulo_libro}' realizada exitosamente")
-    
+        ServicioNotificaciones._emitir(
+            f"[NOTIFICACIÓN] {usuario}: Devolución de '{titulo_libro}' realizada exitosamente\n")
+
     @staticmethod
     def enviar_recordatorio_prestamo(usuario: str, titulo_libro: str, dias_retraso: int):
         """Envía recordatorio de préstamo vencido"""
-        print(f"[RECORDATORIO] {usuario}: El libro '{titulo_libro}' tiene {dias_retraso} días de retraso")
+        ServicioNotificaciones._emitir(
+            f"[RECORDATORIO] {usuario}: El libro '{titulo_libro}' tiene {dias_retraso} días de retraso\n")
 
 
 class SistemaBibliotecaRefactorizado:
@@ -172,15 +353,26 @@ class SistemaBibliotecaRefactorizado:
     """
     
     def __init__(self):
-        self.validador = ValidadorBiblioteca()
+        # ValidadorBiblioteca y ServicioNotificaciones solo tienen métodos
+        # estáticos: se usan directamente como clases, sin instanciar nada
         self.repositorio = RepositorioBiblioteca()
-        self.notificador = ServicioNotificaciones()
+        # Reutilizar las estrategias del Ejercicio 1: una sola implementación
+        # de cada búsqueda (y sus optimizaciones) para ambos ejercicios
+        self._estrategias = {
+            "titulo": BusquedaPorTitulo(self.repositorio.store.titulos_lc,
+                                        self.repositorio.store.titulos_cf_utf8),
+            "autor": BusquedaPorAutor(self.repositorio.store.autores_lc,
+                                      self.repositorio.store.autores_cf_utf8),
+            "isbn": BusquedaPorISBN(),
+            "disponible": BusquedaPorDisponibilidad(
+                self.repositorio._disponibles, self.repositorio.store)
+        }
     
     # Operaciones de Libros
     def agregar_libro(self, titulo: str, autor: str, isbn: str) -> str:
         """Agrega un libro validando datos y delegando persistencia"""
         # Validación
-        errores = self.validador.validar_libro(titulo, autor, isbn)
+        errores = ValidadorBiblioteca.validar_libro(titulo, autor, isbn)
         if errores:
             return "\n".join(errores)
         
@@ -191,46 +383,24 @@ class SistemaBibliotecaRefactorizado:
         return f"Libro '{titulo}' agregado exitosamente (ID: {libro_guardado.id})"
     
     def buscar_libro(self, criterio: str, valor: str) -> List[Libro]:
-        """
-        Busca libros por criterio (manteniendo compatibilidad con ejercicio anterior)
-        En una implementación real, esto usaría las estrategias del Ejercicio 1
-        """
-        libros = self.repositorio.obtener_todos_libros()
-        resultados = []
-        
-        if criterio == "titulo":
-            for libro in libros:
-                if valor.lower() in libro.titulo.lower():
-                    resultados.append(libro)
-        
-        elif criterio == "autor":
-            for libro in libros:
-                if valor.lower() in libro.autor.lower():
-                    resultados.append(libro)
-        
-        elif criterio == "isbn":
-            for libro in libros:
-                if libro.isbn == valor:
-                    resultados.append(libro)
-        
-        elif criterio == "disponible":
-            disponible = valor.lower() == "true"
-            for libro in libros:
-                if libro.disponible == disponible:
-                    resultados.append(libro)
-        
-        return resultados
+        """Busca libros delegando en las estrategias del Ejercicio 1"""
+        estrategia = self._estrategias.get(criterio)
+        if estrategia is None:
+            return []
+        return estrategia.buscar(self.repositorio._iter_libros(), valor)
     
     # Operaciones de Préstamos
     def realizar_prestamo(self, libro_id: int, usuario: str) -> str:
         """Realiza un préstamo validando y delegando responsabilidades"""
+        repo = self.repositorio
+
         # Validaciones
-        errores_usuario = self.validador.validar_usuario(usuario)
+        errores_usuario = ValidadorBiblioteca.validar_usuario(usuario)
         if errores_usuario:
             return "\n".join(errores_usuario)
-        
-        libro = self.repositorio.obtener_libro_por_id(libro_id)
-        errores_libro = self.validador.validar_libro_disponible(libro)
+
+        libro = repo.obtener_libro_por_id(libro_id)
+        errores_libro = ValidadorBiblioteca.validar_libro_disponible(libro)
         if errores_libro:
             return "\n".join(errores_libro)
         
@@ -239,38 +409,41 @@ class SistemaBibliotecaRefactorizado:
             id=None,
             libro_id=libro_id,
             usuario=usuario,
-            fecha=datetime.now().strftime("%Y-%m-%d")
+            # date.today().isoformat() evita construir el datetime completo
+            # y el parseo del formato de strftime; produce el mismo AAAA-MM-DD
+            fecha=date.today().isoformat()
         )
         
-        prestamo_guardado = self.repositorio.agregar_prestamo(prestamo)
+        prestamo_guardado = repo.agregar_prestamo(prestamo)
         libro.disponible = False
-        self.repositorio.actualizar_libro(libro)
-        
+        repo.actualizar_libro(libro)
+
         # Notificación
-        self.notificador.enviar_notificacion_prestamo(usuario, libro.titulo)
+        ServicioNotificaciones.enviar_notificacion_prestamo(usuario, libro.titulo)
         
         return f"Préstamo realizado a {usuario} (ID Préstamo: {prestamo_guardado.id})"
     
     def devolver_libro(self, prestamo_id: int) -> str:
         """Devuelve un libro validando y delegando responsabilidades"""
-        prestamo = self.repositorio.obtener_prestamo_por_id(prestamo_id)
-        
-        errores = self.validador.validar_prestamo_existente(prestamo)
+        repo = self.repositorio
+        prestamo = repo.obtener_prestamo_por_id(prestamo_id)
+
+        errores = ValidadorBiblioteca.validar_prestamo_existente(prestamo)
         if errores:
             return "\n".join(errores)
-        
+
         # Lógica de negocio
-        libro = self.repositorio.obtener_libro_por_id(prestamo.libro_id)
+        libro = repo.obtener_libro_por_id(prestamo.libro_id)
         if libro:
             libro.disponible = True
-            self.repositorio.actualizar_libro(libro)
-        
+            repo.actualizar_libro(libro)
+
         prestamo.devuelto = True
-        self.repositorio.actualizar_prestamo(prestamo)
-        
+        repo.actualizar_prestamo(prestamo)
+
         # Notificación
         if libro:
-            self.notificador.enviar_notificacion_devolucion(prestamo.usuario, libro.titulo)
+            ServicioNotificaciones.enviar_notificacion_devolucion(prestamo.usuario, libro.titulo)
         
         return "Libro devuelto exitosamente"
     
@@ -333,6 +506,9 @@ def main():
     print(f"Libros disponibles: {len(sistema.obtener_libros_disponibles())}")
     print(f"Préstamos activos: {len(sistema.obtener_prestamos_activos())}")
 
+    # Persistir todos los cambios acumulados en una sola escritura
+    sistema.repositorio.flush()
+
 
 if __name__ == "__main__":
     main()
@@ -1,8 +1,49 @@
+import os
+import struct
+import weakref
 from abc import ABC, abstractmethod
-from datetime import datetime
-from typing import List, Optional
+from collections.abc import Sequence as _SequenceABC
+from datetime import date
+from itertools import chain
+from typing import Dict, List, Optional, Sequence
 from libro import Libro
 from prestamo import Prestamo
+from _search_backend import find_substr_lower
+
+# Con menos libros que esto, la comprensión interpretada gana al costo de
+# proyectar la columna y entrar al backend vectorizado
+_UMBRAL_VECTORIZADO = 1024
+
+# Magia del snapshot binario que escribe compactar(); los archivos de texto
+# del formato viejo nunca empiezan con estos bytes
+_MAGIA_BIN = b"BIBv1"
+
+
+def _leer_str(buf, off):
+    """Lee una cadena UTF-8 con prefijo de largo; devuelve (cadena, offset)"""
+    largo = struct.unpack_from('>I', buf, off)[0]
+    off += 4
+    return str(buf[off:off + largo], 'utf-8'), off + largo
+
+
+class _ListaSoloLectura(_SequenceABC):
+    """Vista de solo lectura sobre una lista viva, sin copiarla.
+
+    Devolver una copia defensiva cuesta una asignación O(N) por llamada
+    aunque el consumidor solo itere; esta vista comparte la lista
+    subyacente y no expone mutadores.
+    """
+
+    __slots__ = ('_lista',)
+
+    def __init__(self, lista):
+        self._lista = lista
+
+    def __getitem__(self, indice):
+        return self._lista[indice]
+
+    def __len__(self):
+        return len(self._lista)
 
 
 # 1. Interfaz para el repositorio (clase abstracta)
@@ -16,9 +57,13 @@ class IRepositorioBiblioteca(ABC):
     @abstractmethod
     def obtener_libro_por_id(self, libro_id: int) -> Optional[Libro]:
         pass
-    
+
+    @abstractmethod
+    def obtener_libros_por_isbn(self, isbn: str) -> List[Libro]:
+        pass
+
     @abstractmethod
-    def obtener_todos_libros(self) -> List[Libro]:
+    def obtener_todos_libros(self) -> Sequence[Libro]:
         pass
     
     @abstractmethod
@@ -45,105 +90,336 @@ class IRepositorioBiblioteca(ABC):
     def actualizar_prestamo(self, prestamo: Prestamo) -> None:
         pass
 
+    @abstractmethod
+    def prestar(self, libro: Libro, prestamo: Prestamo) -> Prestamo:
+        """Persiste juntos el alta del préstamo y el libro ya marcado prestado"""
+        pass
+
+    @abstractmethod
+    def devolver(self, libro: Libro, prestamo: Prestamo) -> None:
+        """Persiste juntos el préstamo devuelto y el libro liberado"""
+        pass
+
 
 # 2. Implementación concreta: RepositorioArchivo
 class RepositorioArchivo(IRepositorioBiblioteca):
-    """Implementación que persiste datos en archivo"""
-    
+    """Implementación que persiste datos en archivo.
+
+    La persistencia es un journal de solo-append: cada alta o actualización
+    agrega una línea al final en lugar de reescribir el archivo completo
+    (O(1) por mutación en vez de O(N+M)). Al cargar, los registros se
+    reproducen en orden y el último por id gana.
+    """
+
     def __init__(self, archivo: str = "biblioteca.txt"):
         self.archivo = archivo
         self.libros: List[Libro] = []
         self.prestamos: List[Prestamo] = []
+        # Índices por clave primaria: búsquedas y actualizaciones O(1)
+        self._libros_by_id: Dict[int, Libro] = {}
+        self._prestamos_by_id: Dict[int, Prestamo] = {}
+        # Índice secundario por ISBN; multivaluado porque agregar_libro no
+        # impone unicidad y varios libros pueden compartirlo
+        self._libros_by_isbn: Dict[str, List[Libro]] = {}
+        self._isbn_por_id: Dict[int, str] = {}
+        # Préstamos no devueltos, mantenido incrementalmente (dict y no set
+        # para conservar orden de inserción y borrar en O(1))
+        self._prestamos_activos: Dict[int, Prestamo] = {}
+        # Libros disponibles, mantenido incrementalmente con el mismo
+        # criterio que los préstamos activos
+        self._libros_disponibles: Dict[int, Libro] = {}
+        # Pool de autores: una sola instancia de cada cadena (y de su forma
+        # en minúsculas) compartida entre todos los libros del mismo autor
+        self._autores_pool: Dict[str, str] = {}
+        self._autores_lc: Dict[str, str] = {}
         self.contador_libro = 1
         self.contador_prestamo = 1
         self._cargar_desde_archivo()
-    
+        # Descriptor de larga vida en modo append: cada mutación cuesta un
+        # único os.write, sin open/close ni capa FILE* por registro
+        self._fd = self._abrir_journal()
+
+    def _abrir_journal(self) -> int:
+        fd = os.open(self.archivo,
+                     os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        # finalize no retiene la instancia (a diferencia de atexit con un
+        # método ligado): el fd se cierra al recolectar el repositorio o al
+        # salir del intérprete, lo que ocurra primero
+        self._finalizer = weakref.finalize(self, os.close, fd)
+        return fd
+
+    def close(self):
+        """Cierra el descriptor del journal"""
+        if self._fd is not None:
+            self._finalizer.detach()
+            os.close(self._fd)
+            self._fd = None
+
     def agregar_libro(self, libro: Libro) -> Libro:
         libro.id = self.contador_libro
+        # Cachear las formas en minúsculas: las búsquedas las comparan en
+        # cada consulta sin volver a pagar lower() por libro
+        libro._titulo_lc = libro.titulo.lower()
+        self._internar_autor(libro)
         self.libros.append(libro)
+        self._libros_by_id[libro.id] = libro
+        self._indexar_isbn(libro)
+        self._indexar_disponible(libro)
         self.contador_libro += 1
-        self._guardar_en_archivo()
+        self._append_record(self._registro_libro(libro))
         return libro
-    
+
+    def _indexar_disponible(self, libro: Libro) -> None:
+        """Sincroniza el índice de disponibles con el estado del libro"""
+        if libro.disponible:
+            self._libros_disponibles[libro.id] = libro
+        else:
+            self._libros_disponibles.pop(libro.id, None)
+
+    def _internar_autor(self, libro: Libro) -> None:
+        """Comparte la cadena de autor (y su minúscula) entre libros repetidos.
+
+        Además de la memoria, deja las comparaciones de igualdad entre
+        autores como comparación de punteros, y los autores repetidos ni
+        siquiera vuelven a pagar lower().
+        """
+        autor = self._autores_pool.setdefault(libro.autor, libro.autor)
+        libro.autor = autor
+        autor_lc = self._autores_lc.get(autor)
+        if autor_lc is None:
+            autor_lc = autor.lower()
+            self._autores_lc[autor] = autor_lc
+        libro._autor_lc = autor_lc
+
+    def _indexar_isbn(self, libro: Libro) -> None:
+        """Mantiene el índice por ISBN, retirando la clave vieja si cambió"""
+        isbn_anterior = self._isbn_por_id.get(libro.id)
+        if isbn_anterior != libro.isbn:
+            if isbn_anterior is not None:
+                lista = self._libros_by_isbn.get(isbn_anterior)
+                if lista is not None:
+                    try:
+                        lista.remove(libro)
+                    except ValueError:
+                        pass
+                    if not lista:
+                        del self._libros_by_isbn[isbn_anterior]
+            self._libros_by_isbn.setdefault(libro.isbn, []).append(libro)
+            self._isbn_por_id[libro.id] = libro.isbn
+
     def obtener_libro_por_id(self, libro_id: int) -> Optional[Libro]:
-        for libro in self.libros:
-            if libro.id == libro_id:
-                return libro
-        return None
-    
-    def obtener_todos_libros(self) -> List[Libro]:
-        return self.libros.copy()
-    
+        return self._libros_by_id.get(libro_id)
+
+    def obtener_libros_por_isbn(self, isbn: str) -> List[Libro]:
+        return self._libros_by_isbn.get(isbn, [])[:]
+
+    def obtener_todos_libros(self) -> Sequence[Libro]:
+        return _ListaSoloLectura(self.libros)
+
     def obtener_libros_disponibles(self) -> List[Libro]:
-        return [libro for libro in self.libros if libro.disponible]
-    
+        return list(self._libros_disponibles.values())
+
     def actualizar_libro(self, libro: Libro) -> None:
-        for i, l in enumerate(self.libros):
-            if l.id == libro.id:
-                self.libros[i] = libro
-                break
-        self._guardar_en_archivo()
-    
+        libro._titulo_lc = libro.titulo.lower()
+        self._internar_autor(libro)
+        existente = self._libros_by_id.get(libro.id)
+        if existente is not libro:
+            # Solo un objeto nuevo obliga a reemplazar en la lista; lo normal
+            # es mutar el mismo objeto que ya está indexado
+            for i, l in enumerate(self.libros):
+                if l.id == libro.id:
+                    self.libros[i] = libro
+                    break
+            self._libros_by_id[libro.id] = libro
+        self._indexar_isbn(libro)
+        self._indexar_disponible(libro)
+        self._append_record(self._registro_libro(libro))
+
     def agregar_prestamo(self, prestamo: Prestamo) -> Prestamo:
         prestamo.id = self.contador_prestamo
         self.prestamos.append(prestamo)
+        self._prestamos_by_id[prestamo.id] = prestamo
+        if not prestamo.devuelto:
+            self._prestamos_activos[prestamo.id] = prestamo
         self.contador_prestamo += 1
-        self._guardar_en_archivo()
+        self._append_record(self._registro_prestamo(prestamo))
         return prestamo
-    
+
     def obtener_prestamo_por_id(self, prestamo_id: int) -> Optional[Prestamo]:
-        for prestamo in self.prestamos:
-            if prestamo.id == prestamo_id:
-                return prestamo
-        return None
-    
+        return self._prestamos_by_id.get(prestamo_id)
+
     def obtener_prestamos_activos(self) -> List[Prestamo]:
-        return [p for p in self.prestamos if not p.devuelto]
-    
+        return list(self._prestamos_activos.values())
+
     def actualizar_prestamo(self, prestamo: Prestamo) -> None:
-        for i, p in enumerate(self.prestamos):
-            if p.id == prestamo.id:
-                self.prestamos[i] = prestamo
-                break
-        self._guardar_en_archivo()
-    
-    def _guardar_en_archivo(self):
-        """Guarda el estado actual en archivo"""
-        with open(self.archivo, 'w') as f:
-            f.write(f"Libros: {len(self.libros)}\n")
-            f.write(f"Préstamos: {len(self.prestamos)}\n")
-            # Guardar detalles de libros
-            for libro in self.libros:
-                f.write(f"LIBRO|{libro.id}|{libro.titulo}|{libro.autor}|{libro.isbn}|{libro.disponible}\n")
-            # Guardar detalles de préstamos
-            for prestamo in self.prestamos:
-                f.write(f"PRESTAMO|{prestamo.id}|{prestamo.libro_id}|{prestamo.usuario}|{prestamo.fecha}|{prestamo.devuelto}\n")
-    
-    def _cargar_desde_archivo(self):
-        """Carga datos desde archivo si existe"""
-        try:
-            with open(self.archivo, 'r') as f:
-                lineas = f.readlines()
-            
-            # Reiniciar contadores
-            max_libro_id = 0
-            max_prestamo_id = 0
-            
-            for linea in lineas:
-                partes = linea.strip().split('|')
-                if partes[0] == "LIBRO" and len(partes) == 6:
+        existente = self._prestamos_by_id.get(prestamo.id)
+        if existente is not prestamo:
+            for i, p in enumerate(self.prestamos):
+                if p.id == prestamo.id:
+                    self.prestamos[i] = prestamo
+                    break
+            self._prestamos_by_id[prestamo.id] = prestamo
+        if prestamo.devuelto:
+            self._prestamos_activos.pop(prestamo.id, None)
+        else:
+            self._prestamos_activos[prestamo.id] = prestamo
+        self._append_record(self._registro_prestamo(prestamo))
+
+    def prestar(self, libro: Libro, prestamo: Prestamo) -> Prestamo:
+        # Las dos mutaciones del préstamo viajan en un único os.write en
+        # lugar de pagar un syscall por registro; el libro ya es el objeto
+        # administrado, solo cambió su flag de disponibilidad
+        prestamo.id = self.contador_prestamo
+        self.prestamos.append(prestamo)
+        self._prestamos_by_id[prestamo.id] = prestamo
+        if not prestamo.devuelto:
+            self._prestamos_activos[prestamo.id] = prestamo
+        self.contador_prestamo += 1
+        self._indexar_disponible(libro)
+        self._append_record(self._registro_prestamo(prestamo)
+                            + self._registro_libro(libro))
+        return prestamo
+
+    def devolver(self, libro: Libro, prestamo: Prestamo) -> None:
+        self._indexar_disponible(libro)
+        if prestamo.devuelto:
+            self._prestamos_activos.pop(prestamo.id, None)
+        else:
+            self._prestamos_activos[prestamo.id] = prestamo
+        self._append_record(self._registro_libro(libro)
+                            + self._registro_prestamo(prestamo))
+
+    @staticmethod
+    def _registro_libro(libro: Libro) -> bytes:
+        # str.join sobre campos ya stringificados y un único encode: el
+        # payload llega a _append_record listo para os.write
+        return ('|'.join(('LIBRO', str(libro.id), libro.titulo, libro.autor,
+                          libro.isbn, str(libro.disponible))) + '\n').encode('utf-8')
+
+    @staticmethod
+    def _registro_prestamo(prestamo: Prestamo) -> bytes:
+        return ('|'.join(('PRESTAMO', str(prestamo.id), str(prestamo.libro_id),
+                          prestamo.usuario, prestamo.fecha,
+                          str(prestamo.devuelto))) + '\n').encode('utf-8')
+
+    def _append_record(self, registro: bytes):
+        """Agrega un registro al final del journal: un solo syscall"""
+        os.write(self._fd, registro)
+
+    def compactar(self):
+        """Reescribe el journal como snapshot binario mínimo, un registro por id.
+
+        Todo el contenido se arma en memoria y se escribe con una única
+        llamada a write sobre un temporal que reemplaza al journal: se
+        recortan los registros obsoletos sin pagar una transición
+        Python-libc por línea. Los appends posteriores siguen siendo texto
+        a continuación del bloque binario.
+        """
+        contenido = self._snapshot_bin()
+        self.close()
+        tmp = self.archivo + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(contenido)
+        os.replace(tmp, self.archivo)
+        self._fd = self._abrir_journal()
+
+    def _snapshot_bin(self) -> bytes:
+        """Serializa el estado como bloques SoA empaquetados con struct.
+
+        Cabecera: magia + conteos uint32. Por cada colección, primero los
+        campos numéricos/bool en bloques contiguos y después las cadenas
+        UTF-8 con prefijo de largo; los enteros no pasan por str()/int()
+        ni los bools por "True"/"False".
+        """
+        libros = self.libros
+        prestamos = self.prestamos
+        n = len(libros)
+        m = len(prestamos)
+        partes = [_MAGIA_BIN, struct.pack('>II', n, m)]
+        agregar = partes.append
+        agregar(struct.pack(f'>{n}I', *(l.id for l in libros)))
+        agregar(struct.pack(f'>{n}?', *(l.disponible for l in libros)))
+        for libro in libros:
+            for campo in (libro.titulo, libro.autor, libro.isbn):
+                datos = campo.encode('utf-8')
+                agregar(struct.pack('>I', len(datos)))
+                agregar(datos)
+        agregar(struct.pack(f'>{m}I', *(p.id for p in prestamos)))
+        agregar(struct.pack(f'>{m}I', *(p.libro_id for p in prestamos)))
+        agregar(struct.pack(f'>{m}?', *(p.devuelto for p in prestamos)))
+        for prestamo in prestamos:
+            for campo in (prestamo.usuario, prestamo.fecha):
+                datos = campo.encode('utf-8')
+                agregar(struct.pack('>I', len(datos)))
+                agregar(datos)
+        return b''.join(partes)
+
+    def _cargar_snapshot_bin(self, buf, pares_libros, pares_prestamos) -> int:
+        """Reconstruye los objetos desde el snapshot binario (sin la magia).
+
+        Devuelve el offset donde termina el bloque; lo que siga son
+        registros de texto appendeados después del último compactar.
+        """
+        n, m = struct.unpack_from('>II', buf, 0)
+        off = 8
+        ids = struct.unpack_from(f'>{n}I', buf, off)
+        off += 4 * n
+        disponibles = struct.unpack_from(f'>{n}?', buf, off)
+        off += n
+        for i in range(n):
+            titulo, off = _leer_str(buf, off)
+            autor, off = _leer_str(buf, off)
+            isbn, off = _leer_str(buf, off)
+            libro = Libro(ids[i], titulo, autor, isbn, disponibles[i])
+            libro._titulo_lc = titulo.lower()
+            self._internar_autor(libro)
+            pares_libros.append((ids[i], libro))
+        ids = struct.unpack_from(f'>{m}I', buf, off)
+        off += 4 * m
+        libro_ids = struct.unpack_from(f'>{m}I', buf, off)
+        off += 4 * m
+        devueltos = struct.unpack_from(f'>{m}?', buf, off)
+        off += m
+        for i in range(m):
+            usuario, off = _leer_str(buf, off)
+            fecha, off = _leer_str(buf, off)
+            prestamo = Prestamo(ids[i], libro_ids[i], usuario, fecha)
+            prestamo.devuelto = devueltos[i]
+            pares_prestamos.append((ids[i], prestamo))
+        return off
+    
+    def _parsear_lineas(self, fuente, pares_libros, pares_prestamos):
+        """Replay de registros de texto: acumula pares (id, objeto).
+
+        Descarta líneas ajenas con startswith antes de pagar el split;
+        maxsplit=5 acota el split al número de campos del registro.
+        """
+        for linea in fuente:
+            if linea.startswith("LIBRO|"):
+                # Registros de forma fija: el acceso a partes[5] hace de
+                # chequeo implícito. Una línea corrupta (típicamente la
+                # última, truncada por un corte a mitad de write) levanta
+                # IndexError/ValueError y se descarta sola, sin tirar el
+                # resto del journal
+                try:
+                    partes = linea.rstrip('\n').split('|', 5)
                     libro_id = int(partes[1])
                     libro = Libro(
                         libro_id,
                         partes[2],
                         partes[3],
                         partes[4],
-                        partes[5].lower() == "true"
+                        partes[5][0] in ('t', 'T')
                     )
-                    self.libros.append(libro)
-                    max_libro_id = max(max_libro_id, libro_id)
-                
-                elif partes[0] == "PRESTAMO" and len(partes) == 6:
+                except (IndexError, ValueError):
+                    continue
+                libro._titulo_lc = libro.titulo.lower()
+                self._internar_autor(libro)
+                pares_libros.append((libro_id, libro))
+
+            elif linea.startswith("PRESTAMO|"):
+                try:
+                    partes = linea.rstrip('\n').split('|', 5)
                     prestamo_id = int(partes[1])
                     prestamo = Prestamo(
                         prestamo_id,
@@ -151,20 +427,76 @@ class RepositorioArchivo(IRepositorioBiblioteca):
                         partes[3],
                         partes[4]
                     )
-                    prestamo.devuelto = partes[5].lower() == "true"
-                    self.prestamos.append(prestamo)
-                    max_prestamo_id = max(max_prestamo_id, prestamo_id)
-            
+                    prestamo.devuelto = partes[5][0] in ('t', 'T')
+                except (IndexError, ValueError):
+                    continue
+                pares_prestamos.append((prestamo_id, prestamo))
+
+    def _cargar_desde_archivo(self):
+        """Carga datos: snapshot binario si lo hay y replay del journal de texto"""
+        try:
+            pares_libros = []
+            pares_prestamos = []
+            with open(self.archivo, 'rb') as f:
+                es_binario = f.read(len(_MAGIA_BIN)) == _MAGIA_BIN
+                if es_binario:
+                    # Snapshot binario + cola de registros de texto que se
+                    # appendearon después del último compactar
+                    datos = f.read()
+                    fin = self._cargar_snapshot_bin(memoryview(datos),
+                                                    pares_libros, pares_prestamos)
+                    cola = datos[fin:]
+                    if cola:
+                        self._parsear_lineas(cola.decode('utf-8').split('\n'),
+                                             pares_libros, pares_prestamos)
+            if not es_binario:
+                # Formato de texto: iterar el archivo directamente, sin
+                # materializar readlines()
+                with open(self.archivo, 'r') as f:
+                    # Los archivos del formato viejo traen dos cabeceras con
+                    # los conteos; leerlas aparte evita compararlas en cada
+                    # vuelta. Un journal puro no las tiene: la primera línea
+                    # ya es registro
+                    primera = f.readline()
+                    if primera.startswith("Libros: "):
+                        f.readline()  # "Préstamos: M"
+                        fuente = f
+                    else:
+                        fuente = chain((primera,), f)
+                    self._parsear_lineas(fuente, pares_libros, pares_prestamos)
+
+            # dict(pares) dimensiona la tabla una sola vez en lugar de crecer
+            # por redoblajes; con ids repetidos conserva la posición del primer
+            # registro y el valor del último, que es justo el replay last-wins
+            self._libros_by_id = dict(pares_libros)
+            self.libros = list(self._libros_by_id.values())
+            for libro in self.libros:
+                self._indexar_isbn(libro)
+                if libro.disponible:
+                    self._libros_disponibles[libro.id] = libro
+            self._prestamos_by_id = dict(pares_prestamos)
+            self.prestamos = list(self._prestamos_by_id.values())
+            for prestamo in self.prestamos:
+                if not prestamo.devuelto:
+                    self._prestamos_activos[prestamo.id] = prestamo
+
             # Actualizar contadores
-            self.contador_libro = max_libro_id + 1 if max_libro_id > 0 else 1
-            self.contador_prestamo = max_prestamo_id + 1 if max_prestamo_id > 0 else 1
-            
+            self.contador_libro = max(self._libros_by_id, default=0) + 1
+            self.contador_prestamo = max(self._prestamos_by_id, default=0) + 1
+
             return True
         except FileNotFoundError:
             # Archivo no existe, empezar con datos vacíos
             return False
         except Exception as e:
             print(f"Error cargando archivo: {e}")
+            # Apartar el journal ilegible antes de aceptar escrituras:
+            # appendear registros con ids reiniciados sobre un archivo que
+            # no se pudo reproducir lo corrompería de forma permanente
+            try:
+                os.replace(self.archivo, self.archivo + '.corrupto')
+            except OSError:
+                pass
             return False
 
 
@@ -174,53 +506,160 @@ class RepositorioMemoria(IRepositorioBiblioteca):
     def __init__(self):
         self.libros: List[Libro] = []
         self.prestamos: List[Prestamo] = []
+        self._libros_by_id: Dict[int, Libro] = {}
+        self._prestamos_by_id: Dict[int, Prestamo] = {}
+        self._libros_by_isbn: Dict[str, List[Libro]] = {}
+        self._isbn_por_id: Dict[int, str] = {}
+        self._prestamos_activos: Dict[int, Prestamo] = {}
+        self._libros_disponibles: Dict[int, Libro] = {}
+        # Mismo pool de autores que en RepositorioArchivo
+        self._autores_pool: Dict[str, str] = {}
+        self._autores_lc: Dict[str, str] = {}
         self.contador_libro = 1
         self.contador_prestamo = 1
-    
+
     def agregar_libro(self, libro: Libro) -> Libro:
         libro.id = self.contador_libro
+        libro._titulo_lc = libro.titulo.lower()
+        self._internar_autor(libro)
         self.libros.append(libro)
+        self._libros_by_id[libro.id] = libro
+        self._indexar_isbn(libro)
+        self._indexar_disponible(libro)
         self.contador_libro += 1
         return libro
-    
+
+    def _indexar_disponible(self, libro: Libro) -> None:
+        """Sincroniza el índice de disponibles con el estado del libro"""
+        if libro.disponible:
+            self._libros_disponibles[libro.id] = libro
+        else:
+            self._libros_disponibles.pop(libro.id, None)
+
+    def _internar_autor(self, libro: Libro) -> None:
+        """Comparte la cadena de autor (y su minúscula) entre libros repetidos"""
+        autor = self._autores_pool.setdefault(libro.autor, libro.autor)
+        libro.autor = autor
+        autor_lc = self._autores_lc.get(autor)
+        if autor_lc is None:
+            autor_lc = autor.lower()
+            self._autores_lc[autor] = autor_lc
+        libro._autor_lc = autor_lc
+
+    def _indexar_isbn(self, libro: Libro) -> None:
+        """Mantiene el índice por ISBN, retirando la clave vieja si cambió"""
+        isbn_anterior = self._isbn_por_id.get(libro.id)
+        if isbn_anterior != libro.isbn:
+            if isbn_anterior is not None:
+                lista = self._libros_by_isbn.get(isbn_anterior)
+                if lista is not None:
+                    try:
+                        lista.remove(libro)
+                    except ValueError:
+                        pass
+                    if not lista:
+                        del self._libros_by_isbn[isbn_anterior]
+            self._libros_by_isbn.setdefault(libro.isbn, []).append(libro)
+            self._isbn_por_id[libro.id] = libro.isbn
+
     def obtener_libro_por_id(self, libro_id: int) -> Optional[Libro]:
-        for libro in self.libros:
-            if libro.id == libro_id:
-                return libro
-        return None
-    
-    def obtener_todos_libros(self) -> List[Libro]:
-        return self.libros.copy()
-    
+        return self._libros_by_id.get(libro_id)
+
+    def obtener_libros_por_isbn(self, isbn: str) -> List[Libro]:
+        return self._libros_by_isbn.get(isbn, [])[:]
+
+    def obtener_todos_libros(self) -> Sequence[Libro]:
+        return _ListaSoloLectura(self.libros)
+
     def obtener_libros_disponibles(self) -> List[Libro]:
-        return [libro for libro in self.libros if libro.disponible]
-    
+        return list(self._libros_disponibles.values())
+
     def actualizar_libro(self, libro: Libro) -> None:
-        for i, l in enumerate(self.libros):
-            if l.id == libro.id:
-                self.libros[i] = libro
-                break
-    
+        libro._titulo_lc = libro.titulo.lower()
+        self._internar_autor(libro)
+        existente = self._libros_by_id.get(libro.id)
+        if existente is not libro:
+            for i, l in enumerate(self.libros):
+                if l.id == libro.id:
+                    self.libros[i] = libro
+                    break
+            self._libros_by_id[libro.id] = libro
+        self._indexar_isbn(libro)
+        self._indexar_disponible(libro)
+
     def agregar_prestamo(self, prestamo: Prestamo) -> Prestamo:
         prestamo.id = self.contador_prestamo
         self.prestamos.append(prestamo)
+        self._prestamos_by_id[prestamo.id] = prestamo
+        if not prestamo.devuelto:
+            self._prestamos_activos[prestamo.id] = prestamo
         self.contador_prestamo += 1
         return prestamo
-    
+
     def obtener_prestamo_por_id(self, prestamo_id: int) -> Optional[Prestamo]:
-        for prestamo in self.prestamos:
-            if prestamo.id == prestamo_id:
-                return prestamo
-        return None
-    
+        return self._prestamos_by_id.get(prestamo_id)
+
     def obtener_prestamos_activos(self) -> List[Prestamo]:
-        return [p for p in self.prestamos if not p.devuelto]
-    
+        return list(self._prestamos_activos.values())
+
     def actualizar_prestamo(self, prestamo: Prestamo) -> None:
-        for i, p in enumerate(self.prestamos):
-            if p.id == prestamo.id:
-                self.prestamos[i] = prestamo
-                break
+        existente = self._prestamos_by_id.get(prestamo.id)
+        if existente is not prestamo:
+            for i, p in enumerate(self.prestamos):
+                if p.id == prestamo.id:
+                    self.prestamos[i] = prestamo
+                    break
+            self._prestamos_by_id[prestamo.id] = prestamo
+        if prestamo.devuelto:
+            self._prestamos_activos.pop(prestamo.id, None)
+        else:
+            self._prestamos_activos[prestamo.id] = prestamo
+
+    def prestar(self, libro: Libro, prestamo: Prestamo) -> Prestamo:
+        # Sin persistencia no hay writes que ahorrar: solo las mutaciones
+        self._indexar_disponible(libro)
+        return self.agregar_prestamo(prestamo)
+
+    def devolver(self, libro: Libro, prestamo: Prestamo) -> None:
+        self._indexar_disponible(libro)
+        self.actualizar_prestamo(prestamo)
+
+
+# Cotas de validación y mensajes de error precreados: el camino de rechazo
+# devuelve siempre la misma cadena en lugar de construir una nueva
+_MIN_TITULO = 2
+_MIN_AUTOR = 3
+_MIN_ISBN = 10
+_MIN_USUARIO = 3
+_ERR_TITULO = "Error: Título inválido"
+_ERR_AUTOR = "Error: Autor inválido"
+_ERR_ISBN = "Error: ISBN inválido"
+_ERR_USUARIO = "Error: Nombre de usuario inválido"
+
+
+def _validar_campos_libro(titulo: str, autor: str, isbn: str) -> Optional[str]:
+    """None si los campos son válidos; si no, el mensaje de error cacheado"""
+    if not titulo or len(titulo) < _MIN_TITULO:
+        return _ERR_TITULO
+    if not autor or len(autor) < _MIN_AUTOR:
+        return _ERR_AUTOR
+    if not isbn or len(isbn) < _MIN_ISBN:
+        return _ERR_ISBN
+    return None
+
+
+# La fecha formateada solo cambia a medianoche: se cachea por día (ordinal)
+# para no pagar el formateo en cada préstamo
+_hoy_cache = (0, "")
+
+
+def _get_today_str() -> str:
+    """Fecha de hoy en ISO (YYYY-MM-DD), memoizada hasta el cambio de día"""
+    global _hoy_cache
+    ordinal = date.today().toordinal()
+    if ordinal != _hoy_cache[0]:
+        _hoy_cache = (ordinal, date.fromordinal(ordinal).isoformat())
+    return _hoy_cache[1]
 
 
 # 3. SistemaBiblioteca refactorizado con inyección de dependencias
@@ -233,16 +672,41 @@ class SistemaBibliotecaDIP:
     def __init__(self, repositorio: IRepositorioBiblioteca):
         # Inyección de dependencia: recibimos el repositorio como parámetro
         self.repositorio = repositorio
+
+        def _buscar_isbn(valor, libros):
+            return repositorio.obtener_libros_por_isbn(valor)
+
+        def _buscar_titulo(needle, libros):
+            # Para lotes grandes el barrido se delega al backend (NumPy o
+            # Horspool); con pocos libros la comprensión ya es más barata
+            # que armar la columna
+            if len(libros) >= _UMBRAL_VECTORIZADO:
+                columna = [l._titulo_lc for l in libros]
+                return [libros[i] for i in find_substr_lower(columna, needle)]
+            return [l for l in libros if needle in l._titulo_lc]
+
+        def _buscar_autor(needle, libros):
+            if len(libros) >= _UMBRAL_VECTORIZADO:
+                columna = [l._autor_lc for l in libros]
+                return [libros[i] for i in find_substr_lower(columna, needle)]
+            return [l for l in libros if needle in l._autor_lc]
+
+        # Despacho por criterio construido una sola vez: cada entrada es una
+        # función especializada, sin comparaciones de cadenas por llamada
+        # ni lógica condicional dentro del bucle
+        self._despacho_busqueda = {
+            "titulo": _buscar_titulo,
+            "autor": _buscar_autor,
+            "isbn": _buscar_isbn,
+            "disponible": lambda valor, libros: [l for l in libros if l.disponible == (valor == "true")],
+        }
     
     def agregar_libro(self, titulo: str, autor: str, isbn: str) -> str:
         """Agrega un libro usando el repositorio inyectado"""
-        if not titulo or len(titulo) < 2:
-            return "Error: Título inválido"
-        if not autor or len(autor) < 3:
-            return "Error: Autor inválido"
-        if not isbn or len(isbn) < 10:
-            return "Error: ISBN inválido"
-        
+        error = _validar_campos_libro(titulo, autor, isbn)
+        if error is not None:
+            return error
+
         libro = Libro(None, titulo, autor, isbn, True)
         libro_guardado = self.repositorio.agregar_libro(libro)
         
@@ -250,36 +714,17 @@ class SistemaBibliotecaDIP:
     
     def buscar_libro(self, criterio: str, valor: str) -> List[Libro]:
         """Busca libros usando el repositorio inyectado"""
-        libros = self.repositorio.obtener_todos_libros()
-        resultados = []
-        
-        if criterio == "titulo":
-            for libro in libros:
-                if valor.lower() in libro.titulo.lower():
-                    resultados.append(libro)
-        
-        elif criterio == "autor":
-            for libro in libros:
-                if valor.lower() in libro.autor.lower():
-                    resultados.append(libro)
-        
-        elif criterio == "isbn":
-            for libro in libros:
-                if libro.isbn == valor:
-                    resultados.append(libro)
-        
-        elif criterio == "disponible":
-            disponible = valor.lower() == "true"
-            for libro in libros:
-                if libro.disponible == disponible:
-                    resultados.append(libro)
-        
-        return resultados
+        buscar = self._despacho_busqueda.get(criterio)
+        if buscar is None:
+            return []
+        if criterio != "isbn":
+            valor = valor.lower()
+        return buscar(valor, self.repositorio.obtener_todos_libros())
     
     def realizar_prestamo(self, libro_id: int, usuario: str) -> str:
         """Realiza un préstamo usando el repositorio inyectado"""
-        if not usuario or len(usuario) < 3:
-            return "Error: Nombre de usuario inválido"
+        if not usuario or len(usuario) < _MIN_USUARIO:
+            return _ERR_USUARIO
         
         libro = self.repositorio.obtener_libro_por_id(libro_id)
         if not libro:
@@ -292,12 +737,13 @@ class SistemaBibliotecaDIP:
             None,
             libro_id,
             usuario,
-            datetime.now().strftime("%Y-%m-%d")
+            _get_today_str()
         )
         
-        prestamo_guardado = self.repositorio.agregar_prestamo(prestamo)
+        # Una sola operación de repositorio: préstamo y libro se persisten
+        # juntos en vez de pagar dos escrituras
         libro.disponible = False
-        self.repositorio.actualizar_libro(libro)
+        prestamo_guardado = self.repositorio.prestar(libro, prestamo)
         
         print(f"[NOTIFICACIÓN] {usuario}: Préstamo de '{libro.titulo}'")
         
@@ -314,19 +760,19 @@ class SistemaBibliotecaDIP:
             return "Error: Libro ya devuelto"
         
         libro = self.repositorio.obtener_libro_por_id(prestamo.libro_id)
+        prestamo.devuelto = True
         if libro:
             libro.disponible = True
-            self.repositorio.actualizar_libro(libro)
-        
-        prestamo.devuelto = True
-        self.repositorio.actualizar_prestamo(prestamo)
+            self.repositorio.devolver(libro, prestamo)
+        else:
+            self.repositorio.actualizar_prestamo(prestamo)
         
         if libro:
             print(f"[NOTIFICACIÓN] {prestamo.usuario}: Devolución de '{libro.titulo}'")
         
         return "Libro devuelto exitosamente"
     
-    def obtener_todos_libros(self) -> List[Libro]:
+    def obtener_todos_libros(self) -> Sequence[Libro]:
         return self.repositorio.obtener_todos_libros()
     
     def obtener_libros_disponibles(self) -> List[Libro]:
@@ -391,6 +837,9 @@ def main():
     for libro in libros:
         print(f"- {libro.titulo} (ID: {libro.id})")
 
+    # Compactar el journal: deja un solo registro por id en una sola escritura
+    repositorio.compactar()
+
 
 def demostrar_repositorios_intercambiables():
     """Demuestra que podemos cambiar fácilmente entre repositorios"""
@@ -1,4 +1,10 @@
 class Libro:
+    # __slots__ elimina el __dict__ por instancia (~200 bytes menos por
+    # libro); incluye los campos cacheados en minúsculas que usan las
+    # estrategias de búsqueda
+    __slots__ = ('id', 'titulo', 'autor', 'isbn', 'disponible',
+                 '_titulo_lc', '_autor_lc')
+
     def __init__(self, id, titulo, autor, isbn, disponible=True):
         self.id = id
         self.titulo = titulo
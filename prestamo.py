@@ -1,7 +1,11 @@
 class Prestamo:
+    # Igual que en Libro: sin __dict__ por instancia, menos memoria y
+    # mejor localidad en los recorridos de préstamos
+    __slots__ = ('id', 'libro_id', 'usuario', 'fecha', 'devuelto')
+
     def __init__(self, id, libro_id, usuario, fecha):
         self.id = id
         self.libro_id = libro_id
         self.usuario = usuario
         self.fecha = fecha
-        self.devuelto = False
\ No newline at end of file
+        self.devuelto = False